@@ -0,0 +1,286 @@
+"""
+Helpers shared by the figure-extraction scripts in this directory.
+
+The scripts only decide which papers to process and where each figure goes;
+downloading (pooled session, per-host limits, on-disk cache) and figure
+extraction live here so they behave the same everywhere.
+"""
+import argparse
+import atexit
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import fitz  # PyMuPDF
+
+
+ROOT = Path(__file__).resolve().parents[1]
+IMAGES_DIR = ROOT / "images" / "publications"
+PDF_CACHE_DIR = ROOT / "pdf_cache"
+PDF_MAGIC = b"%PDF-"
+
+USER_AGENT = "SaFoLab-fig-extractor/1.0 (+https://safo-lab.github.io)"
+
+# One pooled session for every download so repeated requests to the same host
+# (arxiv.org, openreview.net) reuse keep-alive connections.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = USER_AGENT
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504]),
+))
+atexit.register(SESSION.close)
+
+MAX_WORKERS = 8
+EXTRACT_WORKERS = 1  # PyMuPDF is not thread-safe; see _mupdf_lock
+PER_HOST_LIMIT = 4
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+# PyMuPDF is not thread-safe, so every fitz call goes through this lock;
+# threads are only used to overlap downloads
+_mupdf_lock = threading.Lock()
+
+
+def slugify(text: str) -> str:
+    """Convert text to a URL-friendly slug."""
+    # The + already collapses runs, so a single pass is enough
+    return _NON_ALNUM.sub("-", text.strip().lower()).strip("-")
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    """Parse the command line options shared by every script."""
+    parser = argparse.ArgumentParser(description=description,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-download every PDF, refreshing its pdf_cache/ entry")
+    return parser.parse_args()
+
+
+def host_slot(url: str) -> threading.Semaphore:
+    """Return the semaphore capping concurrent downloads from url's host."""
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.Semaphore(PER_HOST_LIMIT)
+        return _host_slots[host]
+
+
+def cached_pdf_path(url: str) -> Path:
+    """Return the cache location for a PDF URL."""
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return PDF_CACHE_DIR / f"{key}.pdf"
+
+
+def _looks_like_pdf(head: bytes) -> bool:
+    # Readers accept the %PDF- header anywhere in the first 1 KB
+    return PDF_MAGIC in head[:1024]
+
+
+def _drop_cache_entry(cached: Path):
+    for path in (cached, cached.with_suffix('.etag'), cached.with_suffix('.lastmod')):
+        if path.exists():
+            path.unlink()
+
+
+def fetch_pdf_bytes(url: str, use_cache: bool = True) -> bytes:
+    """Return PDF bytes for URL; see fetch_pdf."""
+    return fetch_pdf(url, use_cache).read_bytes()
+
+
+def fetch_pdf(url: str, use_cache: bool = True) -> Path:
+    """Make sure URL's PDF is in the cache, revalidating when allowed.
+
+    Returns the cache file rather than its bytes, so callers decide when to
+    load it.
+
+    With use_cache=False the cache is not read, but a fresh download still
+    replaces the entry, so a re-run can repair it. Raises ValueError when the
+    server answers with something other than a PDF (an HTML landing page, a
+    rate-limit notice); such bodies are never cached.
+    """
+    cached = cached_pdf_path(url)
+    etag_path = cached.with_suffix('.etag')
+    lastmod_path = cached.with_suffix('.lastmod')
+
+    # Revalidate cached PDFs with the server's validators so an unchanged
+    # paper costs a 304 instead of a full download
+    headers = {}
+    if use_cache and cached.exists():
+        with open(cached, 'rb') as f:
+            head = f.read(1024)
+        if _looks_like_pdf(head):
+            if etag_path.exists():
+                headers['If-None-Match'] = etag_path.read_text().strip()
+            if lastmod_path.exists():
+                headers['If-Modified-Since'] = lastmod_path.read_text().strip()
+            if not headers:
+                print(f"    Using cached PDF for: {url}")
+                return cached
+        else:
+            print(f"    Discarding cached non-PDF for: {url}")
+            _drop_cache_entry(cached)
+
+    if headers:
+        print(f"    Revalidating cached PDF for: {url}")
+    with host_slot(url):
+        # Closing the response returns its connection to the pool on every
+        # path, including errors, 304s and rejected non-PDF bodies
+        with SESSION.get(url, headers=headers, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            if resp.status_code == 304:
+                print(f"    Not modified, using cached PDF for: {url}")
+                return cached
+            print(f"    Downloading from: {url}")
+
+            # Stream into a temp file next to the cache entry, then swap it in
+            # atomically so an interrupted download never leaves a partial PDF
+            PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix='.part')
+            try:
+                # Let urllib3 undo any Content-Encoding and copy in 1MB blocks
+                resp.raw.decode_content = True
+                with os.fdopen(fd, 'w+b') as f:
+                    shutil.copyfileobj(resp.raw, f, length=1024 * 1024)
+                    f.seek(0)
+                    head = f.read(1024)
+                if not _looks_like_pdf(head):
+                    content_type = resp.headers.get('Content-Type', 'unknown')
+                    raise ValueError(f"response is not a PDF (Content-Type: {content_type})")
+                os.replace(tmp, cached)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+            for header, path in (('ETag', etag_path), ('Last-Modified', lastmod_path)):
+                value = resp.headers.get(header)
+                if value:
+                    path.write_text(value)
+                elif path.exists():
+                    path.unlink()
+    return cached
+
+
+def _stream_length(doc, xref: int) -> Optional[int]:
+    # /Length from the image's stream dictionary; reading it decodes nothing
+    kind, value = doc.xref_get_key(xref, "Length")
+    if kind == 'int':
+        return int(value)
+    if kind == 'xref':  # indirect object, e.g. "12 0 R"
+        target = doc.xref_object(int(value.split()[0])).strip()
+        if target.isdigit():
+            return int(target)
+    return None
+
+
+def extract_first_image(pdf_bytes: bytes, out_path_stem: Path, min_bytes: int = 10000,
+                        max_pages: int = 3, dpi: int = 100) -> Optional[Path]:
+    """Save the first substantial image (usually Figure 1) or render page 0.
+
+    Embedded images smaller than min_bytes (logos, icons) are skipped. The
+    extension is picked from the image format. Returns the written file, or
+    None if the PDF has no pages. Safe to call from several threads: MuPDF
+    work is serialized.
+    """
+    with _mupdf_lock, fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_num in range(min(max_pages, doc.page_count)):
+            # Filter on the stored stream length so only a candidate that
+            # passes gets decoded by extract_image
+            for img_ref in doc[page_num].get_images(full=True):
+                xref = img_ref[0]
+                length = _stream_length(doc, xref)
+                if length is not None and length < min_bytes:
+                    continue
+
+                img_dict = doc.extract_image(xref)
+                img_bytes = img_dict.get('image')
+                # The decoded image can differ in size from the stored stream
+                if len(img_bytes) < min_bytes:
+                    continue
+
+                out_path = out_path_stem.with_suffix('.' + img_dict.get('ext', 'png'))
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                out_path.write_bytes(img_bytes)
+                return out_path
+
+        # Fallback: render first page as image
+        if doc.page_count > 0:
+            zoom = dpi / 72
+            pix = doc[0].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            out_path = out_path_stem.with_suffix('.png')
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            pix.save(str(out_path), output="png")
+            return out_path
+
+    return None
+
+
+def _download_paper(i: int, title: str, pdf_url: str,
+                    use_cache: bool) -> Optional[Path]:
+    print(f"[{i+1}] Processing: {title}")
+    try:
+        return fetch_pdf(pdf_url, use_cache)
+    except Exception as e:
+        print(f"[{i+1}]  Failed to download PDF: {e}")
+        return None
+
+
+def _extract_paper(i: int, pdf_path: Path, out_path_stem: Path,
+                   extract_opts: dict) -> Optional[Path]:
+    try:
+        out_path = extract_first_image(pdf_path.read_bytes(), out_path_stem, **extract_opts)
+    except Exception as e:
+        print(f"[{i+1}]  Failed to extract image: {e}")
+        return None
+
+    if out_path is None:
+        print(f"[{i+1}]  No image extracted")
+    else:
+        print(f"[{i+1}]  Saved {out_path.name}")
+    return out_path
+
+
+def process_papers(jobs: Iterable[Tuple[int, str, str, Path]], use_cache: bool = True,
+                   **extract_opts) -> List[Tuple[int, Path]]:
+    """Download and extract a figure for each (index, title, pdf_url, stem) job.
+
+    Downloads run on their own pool and hand each PDF to a single extraction
+    worker as soon as it arrives, so MuPDF work never holds up a download
+    slot and only one document is processed at a time. Workers pass cache
+    paths around and the PDF is read only for extraction, so just one
+    document is held in memory however far downloads run ahead.
+    extract_opts are passed to extract_first_image. Returns (index, image
+    path) for every paper that produced an image, ordered by index, so
+    callers can update their own data once both pools drain.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as download_pool, \
+            ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as extract_pool:
+        downloads = {download_pool.submit(_download_paper, i, title, pdf_url, use_cache): (i, stem)
+                     for i, title, pdf_url, stem in jobs}
+        extractions = {}
+        for future in as_completed(downloads):
+            pdf_path = future.result()
+            if pdf_path is not None:
+                i, stem = downloads[future]
+                extractions[extract_pool.submit(_extract_paper, i, pdf_path, stem, extract_opts)] = i
+        for future in as_completed(extractions):
+            out_path = future.result()
+            if out_path is not None:
+                results.append((extractions[future], out_path))
+    return sorted(results)
@@ -8,38 +8,34 @@ HTML if present, otherwise uses a slugified title.
 
 Usage:
   pip install -r requirements.txt
-  python3 scripts/extract_fig1.py
+  python3 scripts/extract_fig1.py [--no-cache]
+
+Downloaded PDFs are cached under `pdf_cache/` keyed by URL and revalidated
+with ETag/Last-Modified, so re-runs only download papers that are new or have
+changed upstream.
 """
-import os
 import re
 import sys
-import tempfile
 from pathlib import Path
+from typing import Iterator, Tuple
 
-import requests
 from bs4 import BeautifulSoup
-import fitz  # PyMuPDF
+
+from _pdf_figs import IMAGES_DIR, ROOT, parse_args, process_papers, slugify
 
 
-ROOT = Path(__file__).resolve().parents[1]
 HTML_PATH = ROOT / "publications" / "index.html"
-IMAGES_DIR = ROOT / "images" / "publications"
 
 
-def slugify(text: str) -> str:
-    s = text.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-+", "-", s)
-    return s.strip("-")
+# Heuristic: href containing 'pdf' (which also covers a '.pdf' suffix),
+# 'arxiv.org/abs' or 'openreview.net'
+_PDF_HREF = re.compile(r"pdf|arxiv\.org/abs|openreview\.net")
 
 
 def find_pdf_link(tr):
-    # Heuristic: find <a> with href containing 'pdf' or 'arxiv.org/abs' or 'openreview'
-    for a in tr.find_all('a', href=True):
-        href = a['href']
-        if 'pdf' in href or 'arxiv.org/abs' in href or 'openreview.net' in href or href.endswith('.pdf'):
-            return href
-    return None
+    # BeautifulSoup matches the compiled pattern against href itself
+    a = tr.find('a', href=_PDF_HREF)
+    return a['href'] if a else None
 
 
 def normalize_pdf_url(href: str) -> str:
@@ -52,53 +48,14 @@ def normalize_pdf_url(href: str) -> str:
     return 'https://xiaocw11.github.io' + href
 
 
-def download_file(url: str, dest: Path):
-    resp = requests.get(url, stream=True, timeout=30)
-    resp.raise_for_status()
-    with open(dest, 'wb') as f:
-        for chunk in resp.iter_content(1024 * 64):
-            if chunk:
-                f.write(chunk)
-
-
-def extract_first_image_from_pdf(pdf_path: Path, out_path: Path) -> bool:
-    doc = fitz.open(str(pdf_path))
-    # try to extract embedded images first
-    for page in doc:
-        images = page.get_images(full=True)
-        if images:
-            xref = images[0][0]
-            img_dict = doc.extract_image(xref)
-            img_bytes = img_dict.get('image')
-            ext = img_dict.get('ext', 'png')
-            out_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(out_path.with_suffix('.' + ext), 'wb') as f:
-                f.write(img_bytes)
-            return True
-    # fallback: render first page
-    if len(doc) > 0:
-        page = doc[0]
-        pix = page.get_pixmap(dpi=150)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        png_path = out_path.with_suffix('.png')
-        pix.save(str(png_path))
-        return True
-    return False
-
-
-def main():
-    if not HTML_PATH.exists():
-        print(f"Could not find {HTML_PATH}")
-        sys.exit(1)
-
-    soup = BeautifulSoup(HTML_PATH.read_text(encoding='utf-8'), 'html.parser')
-    rows = soup.find_all('tr', class_='publication')
-    print(f"Found {len(rows)} publications in {HTML_PATH}")
-
-    for i, tr in enumerate(rows, 1):
+def iter_jobs(rows) -> Iterator[Tuple[int, str, str, Path]]:
+    for i, tr in enumerate(rows):
         title_tag = tr.find('b')
-        title = title_tag.get_text(strip=True) if title_tag else f'pub-{i}'
+        title = title_tag.get_text(strip=True) if title_tag else f'pub-{i+1}'
         pdf_href = find_pdf_link(tr)
+        if not pdf_href:
+            print(f"[{i+1}] {title}: no pdf link found, skipping")
+            continue
 
         # determine target image path from existing img tag if any
         img_tag = tr.find('img')
@@ -109,30 +66,24 @@ def main():
             slug = slugify(title)
             target_path = IMAGES_DIR / f"{slug}.png"
 
-        print(f"[{i}/{len(rows)}] {title}")
-        if not pdf_href:
-            print("  no pdf link found, skipping")
-            continue
+        yield i, title, normalize_pdf_url(pdf_href), target_path.with_suffix('')
+
+
+def main():
+    args = parse_args(__doc__)
+
+    if not HTML_PATH.exists():
+        print(f"Could not find {HTML_PATH}")
+        sys.exit(1)
+
+    soup = BeautifulSoup(HTML_PATH.read_bytes(), 'lxml')
+    rows = soup.find_all('tr', class_='publication')
+    print(f"Found {len(rows)} publications in {HTML_PATH}")
 
-        pdf_url = normalize_pdf_url(pdf_href)
-        print(f"  pdf: {pdf_url}")
-
-        with tempfile.TemporaryDirectory() as td:
-            pdf_tmp = Path(td) / "paper.pdf"
-            try:
-                download_file(pdf_url, pdf_tmp)
-            except Exception as e:
-                print(f"  failed to download PDF: {e}")
-                continue
-
-            try:
-                ok = extract_first_image_from_pdf(pdf_tmp, target_path.with_suffix(''))
-                if ok:
-                    print(f"  saved figure (check images/publications) ")
-                else:
-                    print("  no image extracted")
-            except Exception as e:
-                print(f"  failed to extract image: {e}")
+    # take the first embedded image on the first two pages, however small
+    results = process_papers(iter_jobs(rows), use_cache=not args.no_cache,
+                             min_bytes=0, max_pages=2)
+    print(f"Saved {len(results)}/{len(rows)} figures")
 
 
 if __name__ == '__main__':